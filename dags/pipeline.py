@@ -1,7 +1,9 @@
 """
-Procurement System Daily ETL Pipeline DAG (Trino-based) - Sequential Execution with HDFS Storage
+Procurement System Daily ETL Pipeline DAG (Trino-based) with HDFS Storage
 
-This DAG orchestrates the complete daily procurement data pipeline sequentially:
+This DAG orchestrates the complete daily procurement data pipeline.
+Ingest tasks 1-3 are independent and run in parallel; tasks 4-8 run sequentially,
+while the cheapest-supplier cache is refreshed alongside tasks 5-6:
 1. Load orders to HDFS
 2. Load stock to HDFS
 3. Store snapshots to Cassandra
@@ -15,22 +17,36 @@ Schedule: Daily at 23:00
 Author: Procurement System Team
 """
 
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from airflow import DAG
 from airflow.operators.python import PythonOperator
 from airflow.providers.apache.hdfs.hooks.webhdfs import WebHDFSHook
 from airflow.providers.apache.cassandra.hooks.cassandra import CassandraHook
 from airflow.exceptions import AirflowException
+from airflow.models.xcom import XCom
+from cassandra.concurrent import execute_concurrent, execute_concurrent_with_args
+from cassandra.query import BatchStatement, BatchType
 
 import os
-import json
 import csv
 import logging
-from pathlib import Path
-from typing import Dict
+from typing import Dict, Tuple
 import traceback
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import groupby
+from operator import itemgetter
+import orjson
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import requests
 import trino
+from trino.exceptions import TrinoUserError
 from io import StringIO
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # =============================================================================
 # CONFIGURATION
@@ -42,7 +58,6 @@ DATE_FORMAT = "%d-%m-%Y"
 BASE_DATA_PATH = "/opt/airflow/data"
 RAW_PATH = f"{BASE_DATA_PATH}/raw"
 PROCESSED_PATH = f"{BASE_DATA_PATH}/processed"
-OUTPUT_PATH = f"{BASE_DATA_PATH}/output"
 LOGS_PATH = f"{BASE_DATA_PATH}/logs"
 
 # HDFS paths
@@ -52,6 +67,11 @@ HDFS_PROCESSED_PATH = f"{HDFS_BASE_PATH}/processed"
 HDFS_OUTPUT_PATH = f"{HDFS_BASE_PATH}/output"
 HDFS_LOGS_PATH = f"{HDFS_BASE_PATH}/logs"
 
+# Airflow pools
+INGEST_POOL = "ingest_pool"  # bounds the parallel HDFS ingest tasks 1-2
+CASSANDRA_POOL = "cassandra_pool"  # Cassandra write load (task 3)
+TRINO_POOL = "trino_pool"  # caps concurrent queries on the Trino coordinator (tasks 4-7)
+
 # Connection IDs
 HDFS_CONN_ID = "hdfs_default"
 CASSANDRA_CONN_ID = "cassandra_default"
@@ -65,55 +85,280 @@ TRINO_CATALOG_POSTGRES = "postgresql"
 TRINO_CATALOG_CASSANDRA = "cassandra"
 TRINO_SCHEMA_HIVE = "procurement"
 TRINO_SCHEMA_POSTGRES = "public"
+TRINO_FETCH_SIZE = 10000  # rows pulled per cursor.fetchmany() call
+TRINO_SOURCE = "procurement-dag"
+TRINO_TO_ARROW_TYPES = {
+    'bigint': pa.int64(),
+    'integer': pa.int32(),
+    'smallint': pa.int16(),
+    'tinyint': pa.int8(),
+    'double': pa.float64(),
+    'real': pa.float32(),
+    'boolean': pa.bool_(),
+    'date': pa.date32(),
+    'timestamp': pa.timestamp('us'),
+    'varchar': pa.string(),
+}
+TRINO_REQUEST_TIMEOUT = 60  # seconds per HTTP request to the coordinator
+TRINO_TARGET_RESULT_SIZE = "16MB"  # result page size per round-trip (server default 1MB)
+# Every join in the pipeline has a small build side (Postgres master data, staged inventory,
+# cached suppliers): replicate it to all workers and let it prune the probe-side scan
+TRINO_SESSION_PROPERTIES = {
+    'join_distribution_type': 'BROADCAST',
+    'enable_dynamic_filtering': 'true',
+    'join_reordering_strategy': 'AUTOMATIC',
+}
+
+# Trino caching: tasks 5-7 re-scan the same HDFS-backed Hive tables each run.
+# Operators should enable the worker file system cache in
+# trino/etc/catalog/hive.properties (fs.cache.enabled, fs.cache.directories,
+# fs.cache.max-sizes) so repeated reads hit local SSD instead of HDFS.
+# No change to get_trino_connection() or the SQL is needed.
 
 # Cassandra settings
 CASSANDRA_KEYSPACE = "procurement"
 CASSANDRA_TABLE = "inventory_snapshots"
+CASSANDRA_WRITE_CONCURRENCY = 100  # in-flight requests for snapshot inserts
+CASSANDRA_BATCH_SIZE = 100  # max rows per single-partition UNLOGGED batch
+CASSANDRA_REQUEST_TIMEOUT = 30  # seconds
+
+# Run logs: records are appended locally and uploaded to HDFS once per DAG run
+TASK_LOG_FILE = "task_log.ndjson"
+EXCEPTION_LOG_FILE = "exceptions.ndjson"
+
+HDFS_WRITE_CHUNK_ROWS = 10000  # CSV rows buffered per streamed HDFS write
+HDFS_BUFFER_SIZE = 8 * 1024 * 1024  # WebHDFS buffersize: DataNode I/O buffer per write (default 64KB)
+HDFS_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # bytes read from a local file per upload chunk
+
+_HDFS_CLIENT = None
 
 
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
 
+def create_trino_http_session() -> requests.Session:
+    """Create a pooled HTTP session for one Trino connection"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # Sent on every statement request, so result pages come back at the larger size
+    session.params['targetResultSize'] = TRINO_TARGET_RESULT_SIZE
+    return session
+
+
 def get_trino_connection():
-    """Create and return a Trino connection"""
+    """Create and return a Trino connection with its own pooled HTTP session"""
+    # Not shared: the trino client writes per-connection headers into the session
+    # and conn.close() closes it at the end of each task
     return trino.dbapi.connect(
         host=TRINO_HOST,
         port=TRINO_PORT,
         user=TRINO_USER,
         catalog=TRINO_CATALOG_HIVE,
-        schema=TRINO_SCHEMA_HIVE
+        schema=TRINO_SCHEMA_HIVE,
+        source=TRINO_SOURCE,
+        request_timeout=TRINO_REQUEST_TIMEOUT,
+        session_properties=TRINO_SESSION_PROPERTIES,
+        http_session=create_trino_http_session()
     )
 
 
+def fetch_in_batches(cursor, size: int = TRINO_FETCH_SIZE):
+    """Yield result rows from a Trino cursor in batches of `size` rows"""
+    yield from iter(lambda: cursor.fetchmany(size), [])
+
+
+def get_hdfs_client():
+    """Return the WebHDFS client (and its pooled HTTP session) shared by all HDFS calls in this process"""
+    global _HDFS_CLIENT
+    if _HDFS_CLIENT is None:
+        client = WebHDFSHook(webhdfs_conn_id=HDFS_CONN_ID).get_conn()
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=32,
+            # Only connection failures are retried: streamed upload bodies cannot be replayed
+            max_retries=Retry(total=3, read=0, backoff_factor=0.2)
+        )
+        # hdfs.Client keeps its requests.Session on _session
+        client._session.mount("http://", adapter)
+        client._session.mount("https://", adapter)
+        _HDFS_CLIENT = client
+    return _HDFS_CLIENT
+
+
+def write_csv_to_hdfs(hdfs_path: str, header, rows) -> int:
+    """Stream CSV rows straight into an HDFS file (no local temp file) and return the row count"""
+    row_count = 0
+    buffer = StringIO()
+    # '\n' line endings so typed TEXTFILE tables can read the last column
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(header)
+    
+    hdfs_client = get_hdfs_client()
+    with hdfs_client.write(hdfs_path, overwrite=True, buffersize=HDFS_BUFFER_SIZE, encoding='utf-8') as hdfs_file:
+        for row in rows:
+            writer.writerow(row)
+            row_count += 1
+            # Hand rows to the upload in chunks rather than one HTTP chunk per row
+            if row_count % HDFS_WRITE_CHUNK_ROWS == 0:
+                hdfs_file.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+        hdfs_file.write(buffer.getvalue())
+    
+    return row_count
+
+
+class HdfsStreamSink:
+    """Minimal writable file object over an hdfs write stream, so pyarrow can wrap it"""
+    closed = False
+    
+    def __init__(self, hdfs_file):
+        self._hdfs_file = hdfs_file
+    
+    def write(self, data) -> None:
+        self._hdfs_file.write(bytes(data))
+    
+    def close(self) -> None:
+        # The enclosing hdfs_client.write() context completes the upload
+        self.closed = True
+
+
+@contextmanager
+def open_hdfs_parquet_writer(hdfs_path: str, schema: pa.Schema):
+    """Yield a zstd ParquetWriter that streams into an HDFS file in HDFS_BUFFER_SIZE chunks"""
+    hdfs_client = get_hdfs_client()
+    with hdfs_client.write(hdfs_path, overwrite=True, buffersize=HDFS_BUFFER_SIZE) as hdfs_file, \
+            pa.BufferedOutputStream(pa.PythonFile(HdfsStreamSink(hdfs_file), mode='w'),
+                                    buffer_size=HDFS_BUFFER_SIZE) as sink, \
+            pq.ParquetWriter(sink, schema, compression='zstd', use_dictionary=True) as parquet_writer:
+        yield parquet_writer
+
+
+def export_query_results(cursor, hdfs_csv_path: str, hdfs_parquet_path: str) -> int:
+    """Stream an executed Trino query to HDFS as CSV and Parquet in one pass; return the row count"""
+    columns = [desc[0] for desc in cursor.description]
+    schema = arrow_schema_from_description(cursor.description)
+    
+    with open_hdfs_parquet_writer(hdfs_parquet_path, schema) as parquet_writer:
+        def rows():
+            # Each fetched batch feeds both the Parquet stream and the CSV stream
+            for batch in fetch_in_batches(cursor):
+                parquet_writer.write_batch(rows_to_record_batch(batch, schema))
+                yield from batch
+        
+        row_count = write_csv_to_hdfs(hdfs_csv_path, columns, rows())
+    
+    return row_count
+
+
+@lru_cache(maxsize=32)
+def format_run_dates(execution_date: datetime) -> Tuple[str, str]:
+    """Format an execution date as (DATE_FORMAT, ISO) strings, cached per date"""
+    return execution_date.strftime(DATE_FORMAT), execution_date.strftime("%Y-%m-%d")
+
+
+def resolve_run_dates(context: Dict) -> Tuple[str, str]:
+    """Resolve the run's execution date from the Airflow context"""
+    execution_date = context.get('execution_date') or context.get('logical_date') or datetime.now()
+    if hasattr(execution_date, 'to_pydatetime'):
+        execution_date = execution_date.to_pydatetime()
+    return format_run_dates(execution_date)
+
+
+def with_execution_date(task_fn):
+    """Task decorator: inject date_str and date_str_iso for the run's execution date"""
+    @wraps(task_fn)
+    def wrapper(**context):
+        date_str, date_str_iso = resolve_run_dates(context)
+        return task_fn(date_str=date_str, date_str_iso=date_str_iso, **context)
+    return wrapper
+
+
+def append_log_record(log_file: str, record: Dict) -> None:
+    """Append one JSON record as a line to a local NDJSON log file"""
+    os.makedirs(os.path.dirname(log_file), mode=0o777, exist_ok=True)
+    with open(log_file, 'ab') as f:
+        f.write(orjson.dumps(record, default=str, option=orjson.OPT_APPEND_NEWLINE))
+
+
+def resolve_raw_json_file(raw_dir: str, name: str) -> str:
+    """Return the path of a raw JSON Lines file, falling back to the legacy JSON array file"""
+    for candidate in (f"{raw_dir}/{name}.ndjson", f"{raw_dir}/{name}.json"):
+        if os.path.exists(candidate):
+            return candidate
+    raise FileNotFoundError(f"No {name}.ndjson or {name}.json found in {raw_dir}")
+
+
+def iter_raw_json_records(path: str):
+    """Yield records from a JSON Lines file one line at a time, or from a legacy JSON array file"""
+    with open(path, 'rb') as f:
+        if path.endswith('.ndjson'):
+            for line in f:
+                if line.strip():
+                    yield orjson.loads(line)
+        else:
+            yield from orjson.loads(f.read())
+
+
+def map_trino_type(type_code: str, precision, scale) -> Tuple[str, pa.DataType]:
+    """Map a Trino result column type (e.g. 'decimal(12,4)') to its (Hive DDL type, Arrow type) pair"""
+    base_type = type_code.split('(', 1)[0]
+    if base_type == 'decimal':
+        return f"decimal({precision}, {scale})", pa.decimal128(precision, scale)
+    if base_type in TRINO_TO_ARROW_TYPES:
+        return base_type, TRINO_TO_ARROW_TYPES[base_type]
+    return 'varchar', pa.string()
+
+
+def arrow_schema_from_description(description) -> pa.Schema:
+    """Build a Parquet/Arrow schema from a Trino cursor description"""
+    return pa.schema([
+        pa.field(name, map_trino_type(type_code, precision, scale)[1])
+        for name, type_code, _, _, precision, scale, _ in description
+    ])
+
+
+def rows_to_record_batch(rows, schema: pa.Schema) -> pa.RecordBatch:
+    """Transpose a batch of Trino rows into a columnar Arrow record batch"""
+    columns = list(zip(*rows))
+    arrays = [pa.array(column, type=field.type) for column, field in zip(columns, schema)]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def get_run_xcom_reader(ti, run_id: str):
+    """Return an xcom(task_id, key) reader backed by a single bulk XCom query for the DAG run"""
+    try:
+        run_xcoms = {
+            (x.task_id, x.key): XCom.deserialize_value(x)
+            for x in XCom.get_many(run_id=run_id, dag_ids=ti.dag_id)
+        }
+    except Exception as e:
+        logging.warning(f"Bulk XCom fetch failed, falling back to per-key pulls: {e}")
+        return lambda task_id, key: ti.xcom_pull(task_ids=task_id, key=key)
+    
+    return lambda task_id, key: run_xcoms.get((task_id, key))
+
+
 def log_task_execution(task_name: str, execution_date: str, status: str, 
                        details: Dict = None, context: Dict = None) -> str:
-    """Log task execution details to JSON file locally and in HDFS"""
+    """Append task execution details to the run's local log (uploaded to HDFS at end of run)"""
     try:
-        # Create local log directory
-        log_dir = f"{LOGS_PATH}/tasks/{execution_date}"
-        os.makedirs(log_dir, mode=0o777, exist_ok=True)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        local_log_file = os.path.join(log_dir, f"{task_name}_{timestamp}.json")
+        local_log_file = f"{LOGS_PATH}/tasks/{execution_date}/{TASK_LOG_FILE}"
         
         log_data = {
             "task_name": task_name,
-            "timestamp": timestamp,
+            "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S"),
             "execution_date": execution_date,
             "status": status,
             "details": details or {},
         }
         
-        with open(local_log_file, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        append_log_record(local_log_file, log_data)
         
-        # Upload to HDFS
-        hdfs_hook = WebHDFSHook(webhdfs_conn_id=HDFS_CONN_ID)
-        hdfs_log_path = f"{HDFS_LOGS_PATH}/tasks/{execution_date}/{task_name}_{timestamp}.json"
-        hdfs_hook.load_file(source=local_log_file, destination=hdfs_log_path, overwrite=True)
-        
-        return hdfs_log_path
+        return local_log_file
     except Exception as log_err:
         logging.warning(f"Failed to write task execution log: {log_err}")
         return ""
@@ -121,18 +366,13 @@ def log_task_execution(task_name: str, execution_date: str, status: str,
 
 def log_exception(exception: Exception, task_name: str, execution_date: str, 
                   additional_info: Dict = None) -> str:
-    """Log exception details to JSON file locally and in HDFS, then raise"""
+    """Append exception details to the run's local log (uploaded to HDFS at end of run), then raise"""
     try:
-        # Create local exception directory
-        exception_dir = f"{LOGS_PATH}/exceptions/{execution_date}"
-        os.makedirs(exception_dir, mode=0o777, exist_ok=True)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        local_exception_file = os.path.join(exception_dir, f"{task_name}_{timestamp}.json")
+        local_exception_file = f"{LOGS_PATH}/exceptions/{execution_date}/{EXCEPTION_LOG_FILE}"
         
         exception_data = {
             "task_name": task_name,
-            "timestamp": timestamp,
+            "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S"),
             "execution_date": execution_date,
             "error_type": type(exception).__name__,
             "error_message": str(exception),
@@ -140,36 +380,50 @@ def log_exception(exception: Exception, task_name: str, execution_date: str,
             "additional_info": additional_info or {}
         }
         
-        with open(local_exception_file, 'w') as f:
-            json.dump(exception_data, f, indent=2)
-        
-        # Upload to HDFS
-        hdfs_hook = WebHDFSHook(webhdfs_conn_id=HDFS_CONN_ID)
-        hdfs_exception_path = f"{HDFS_LOGS_PATH}/exceptions/{execution_date}/{task_name}_{timestamp}.json"
-        hdfs_hook.load_file(source=local_exception_file, destination=hdfs_exception_path, overwrite=True)
+        append_log_record(local_exception_file, exception_data)
         
-        logging.error(f"Exception logged to HDFS: {hdfs_exception_path}")
+        logging.error(f"Exception logged to: {local_exception_file}")
     except Exception as log_err:
         logging.warning(f"Failed to write exception log: {log_err}")
     
     raise AirflowException(f"{task_name} failed: {str(exception)}")
 
 
+def flush_logs_to_hdfs(context: Dict) -> None:
+    """DAG-level callback: upload the run's task and exception logs to HDFS in one go"""
+    date_str, _ = resolve_run_dates(context)
+    
+    try:
+        hdfs_client = get_hdfs_client()
+        uploads = []
+        for kind, file_name in (("tasks", TASK_LOG_FILE), ("exceptions", EXCEPTION_LOG_FILE)):
+            local_file = f"{LOGS_PATH}/{kind}/{date_str}/{file_name}"
+            if os.path.exists(local_file):
+                uploads.append((f"{HDFS_LOGS_PATH}/{kind}/{date_str}/{file_name}", local_file))
+        
+        # The two log files are independent: upload them concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = {
+                executor.submit(hdfs_client.upload, hdfs_path, local_file, overwrite=True,
+                                chunk_size=HDFS_UPLOAD_CHUNK_SIZE, buffersize=HDFS_BUFFER_SIZE): hdfs_path
+                for hdfs_path, local_file in uploads
+            }
+            for future in as_completed(futures):
+                future.result()
+                logging.info(f"Run logs uploaded to HDFS: {futures[future]}")
+    except Exception as log_err:
+        logging.warning(f"Failed to upload run logs to HDFS: {log_err}")
+
+
 # =============================================================================
 # TASK 1: LOAD ORDERS TO HDFS
 # =============================================================================
 
-def load_orders_to_hdfs(**context):
+@with_execution_date
+def load_orders_to_hdfs(date_str: str, date_str_iso: str, **context):
     """Load orders from local directory to HDFS"""
     logging.info("Loading orders to HDFS...")
     
-    execution_date = context.get('execution_date') or context.get('logical_date') or datetime.now()
-    if hasattr(execution_date, 'to_pydatetime'):
-        execution_date = execution_date.to_pydatetime()
-    
-    date_str = execution_date.strftime(DATE_FORMAT)
-    date_str_iso = execution_date.strftime("%Y-%m-%d")
-    
     try:
         ti = context['ti']
         orders_file = f"{RAW_PATH}/orders/{date_str}/orders.csv"
@@ -177,10 +431,11 @@ def load_orders_to_hdfs(**context):
         if not os.path.exists(orders_file):
             raise FileNotFoundError(f"Orders file not found at {orders_file}")
         
-        hdfs_hook = WebHDFSHook(webhdfs_conn_id=HDFS_CONN_ID)
+        hdfs_client = get_hdfs_client()
         hdfs_orders_path = f"{HDFS_RAW_PATH}/orders/{date_str}/orders.csv"
         
-        hdfs_hook.load_file(source=orders_file, destination=hdfs_orders_path, overwrite=True)
+        hdfs_client.upload(hdfs_orders_path, orders_file, overwrite=True,
+                           chunk_size=HDFS_UPLOAD_CHUNK_SIZE, buffersize=HDFS_BUFFER_SIZE)
         
         log_task_execution("load_orders_to_hdfs", date_str, "success", {
             "hdfs_path": hdfs_orders_path,
@@ -201,41 +456,26 @@ def load_orders_to_hdfs(**context):
 # TASK 2: LOAD STOCK TO HDFS
 # =============================================================================
 
-def load_stock_to_hdfs(**context):
+@with_execution_date
+def load_stock_to_hdfs(date_str: str, date_str_iso: str, **context):
     """Load stock from local directory to HDFS (convert JSON to CSV)"""
     logging.info("Loading stock to HDFS...")
     
-    execution_date = context.get('execution_date') or context.get('logical_date') or datetime.now()
-    if hasattr(execution_date, 'to_pydatetime'):
-        execution_date = execution_date.to_pydatetime()
-    
-    date_str = execution_date.strftime(DATE_FORMAT)
-    
     try:
         ti = context['ti']
-        stock_file = f"{RAW_PATH}/stock/{date_str}/stock.json"
-        
-        if not os.path.exists(stock_file):
-            raise FileNotFoundError(f"Stock file not found at {stock_file}")
-        
-        # Convert JSON to CSV for Hive compatibility
-        with open(stock_file, 'r') as f:
-            stock_data = json.load(f)
-        
-        stock_csv_file = stock_file.replace('.json', '.csv')
-        with open(stock_csv_file, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['warehouse_id', 'sku_id', 'current_stock'])
-            writer.writeheader()
-            writer.writerows(stock_data)
+        stock_file = resolve_raw_json_file(f"{RAW_PATH}/stock/{date_str}", "stock")
         
-        hdfs_hook = WebHDFSHook(webhdfs_conn_id=HDFS_CONN_ID)
         hdfs_stock_path = f"{HDFS_RAW_PATH}/stock/{date_str}/stock.csv"
         
-        hdfs_hook.load_file(source=stock_csv_file, destination=hdfs_stock_path, overwrite=True)
+        # Convert JSON records to CSV for Hive compatibility, streaming records straight into HDFS
+        stock_columns = ['warehouse_id', 'sku_id', 'current_stock']
+        get_stock_row = itemgetter(*stock_columns)
+        stock_rows = (get_stock_row(record) for record in iter_raw_json_records(stock_file))
+        record_count = write_csv_to_hdfs(hdfs_stock_path, stock_columns, stock_rows)
         
         log_task_execution("load_stock_to_hdfs", date_str, "success", {
             "hdfs_path": hdfs_stock_path,
-            "record_count": len(stock_data)
+            "record_count": record_count
         }, context)
         
         ti.xcom_push(key='hdfs_stock_path', value=hdfs_stock_path)
@@ -249,28 +489,21 @@ def load_stock_to_hdfs(**context):
 # TASK 3: STORE SNAPSHOTS TO CASSANDRA
 # =============================================================================
 
-def store_snapshots_to_cassandra(**context):
+@with_execution_date
+def store_snapshots_to_cassandra(date_str: str, date_str_iso: str, **context):
     """Store inventory snapshots to Cassandra"""
     logging.info("Storing snapshots to Cassandra...")
     
-    execution_date = context.get('execution_date') or context.get('logical_date') or datetime.now()
-    if hasattr(execution_date, 'to_pydatetime'):
-        execution_date = execution_date.to_pydatetime()
-    
-    date_str = execution_date.strftime(DATE_FORMAT)
-    
     try:
         ti = context['ti']
-        snapshots_file = f"{RAW_PATH}/snapshots/{date_str}/snapshot.json"
-        
-        if not os.path.exists(snapshots_file):
-            raise FileNotFoundError(f"Snapshots file not found: {snapshots_file}")
-        
-        with open(snapshots_file, 'r') as f:
-            snapshots = json.load(f)
+        snapshots_file = resolve_raw_json_file(f"{RAW_PATH}/snapshots/{date_str}", "snapshot")
+        snapshots = list(iter_raw_json_records(snapshots_file))
         
+        # Load balancing (TokenAwarePolicy over DCAwareRoundRobinPolicy) is
+        # configured on the cassandra_default connection extras
         cassandra_hook = CassandraHook(cassandra_conn_id=CASSANDRA_CONN_ID)
         session = cassandra_hook.get_conn()
+        session.default_timeout = CASSANDRA_REQUEST_TIMEOUT
         
         insert_query = f"""
             INSERT INTO {CASSANDRA_KEYSPACE}.{CASSANDRA_TABLE} 
@@ -279,14 +512,31 @@ def store_snapshots_to_cassandra(**context):
         """
         prepared_stmt = session.prepare(insert_query)
         
-        for snapshot in snapshots:
-            session.execute(prepared_stmt, [
-                snapshot['sku_code'],
-                snapshot['snapshot_date'],
-                snapshot['warehouse_code'],
-                snapshot['available_qty'],
-                snapshot['reserved_qty']
-            ])
+        param_tuples = sorted(
+            (s['sku_code'], s['snapshot_date'], s['warehouse_code'], s['available_qty'], s['reserved_qty'])
+            for s in snapshots
+        )
+        
+        # One UNLOGGED batch per partition (sku_code), capped at CASSANDRA_BATCH_SIZE rows.
+        # Batches never span partitions, so each one is a single replica write.
+        batches = []
+        for _, partition_rows in groupby(param_tuples, key=lambda row: row[0]):
+            partition_rows = list(partition_rows)
+            for start in range(0, len(partition_rows), CASSANDRA_BATCH_SIZE):
+                batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+                for params in partition_rows[start:start + CASSANDRA_BATCH_SIZE]:
+                    batch.add(prepared_stmt, params)
+                batches.append((batch, None))
+        
+        # Keep many batches in flight instead of waiting on one round-trip each
+        results = execute_concurrent(
+            session, batches,
+            concurrency=CASSANDRA_WRITE_CONCURRENCY,
+            raise_on_first_error=False
+        )
+        failures = [result for success, result in results if not success]
+        if failures:
+            raise RuntimeError(f"{len(failures)} of {len(batches)} snapshot batches failed: {failures[0]}")
         
         log_task_execution("store_snapshots_to_cassandra", date_str, "success", {
             "inserted_count": len(snapshots)
@@ -303,16 +553,11 @@ def store_snapshots_to_cassandra(**context):
 # TASK 4: CREATE HIVE TABLES
 # =============================================================================
 
-def create_hive_tables(**context):
+@with_execution_date
+def create_hive_tables(date_str: str, date_str_iso: str, **context):
     """Create Hive external tables for orders and stock data pointing to HDFS"""
     logging.info("Creating Hive tables...")
     
-    execution_date = context.get('execution_date') or context.get('logical_date') or datetime.now()
-    if hasattr(execution_date, 'to_pydatetime'):
-        execution_date = execution_date.to_pydatetime()
-    
-    date_str = execution_date.strftime(DATE_FORMAT)
-    
     try:
         ti = context['ti']
         
@@ -326,34 +571,36 @@ def create_hive_tables(**context):
         cursor.execute(f"DROP TABLE IF EXISTS {TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.orders")
         cursor.execute(f"DROP TABLE IF EXISTS {TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.stock")
         
-        # Create orders table
+        # Create orders table (typed TEXTFILE: the CSV format only supports VARCHAR columns)
         orders_hdfs_dir = f"hdfs://namenode:9000{HDFS_RAW_PATH}/orders/{date_str}"
         cursor.execute(f"""
             CREATE TABLE {TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.orders (
                 order_id VARCHAR,
-                supplier_id VARCHAR,
-                sku_id VARCHAR,
-                quantity VARCHAR,
-                warehouse_id VARCHAR,
+                supplier_id BIGINT,
+                sku_id BIGINT,
+                quantity BIGINT,
+                warehouse_id BIGINT,
                 order_date VARCHAR
             )
             WITH (
-                format = 'CSV',
+                format = 'TEXTFILE',
+                textfile_field_separator = ',',
                 external_location = '{orders_hdfs_dir}',
                 skip_header_line_count = 1
             )
         """)
         
-        # Create stock table
+        # Create stock table (typed TEXTFILE, so queries need no per-row casts)
         stock_hdfs_dir = f"hdfs://namenode:9000{HDFS_RAW_PATH}/stock/{date_str}"
         cursor.execute(f"""
             CREATE TABLE {TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.stock (
-                warehouse_id VARCHAR,
-                sku_id VARCHAR,
-                current_stock VARCHAR
+                warehouse_id BIGINT,
+                sku_id BIGINT,
+                current_stock BIGINT
             )
             WITH (
-                format = 'CSV',
+                format = 'TEXTFILE',
+                textfile_field_separator = ',',
                 external_location = '{stock_hdfs_dir}',
                 skip_header_line_count = 1
             )
@@ -377,7 +624,7 @@ def create_hive_tables(**context):
         ti.xcom_push(key='orders_count', value=orders_count)
         ti.xcom_push(key='stock_count', value=stock_count)
         ti.xcom_push(key='date_str', value=date_str)
-        ti.xcom_push(key='date_str_iso', value=execution_date.strftime("%Y-%m-%d"))
+        ti.xcom_push(key='date_str_iso', value=date_str_iso)
         
         return {"status": "success", "orders_count": orders_count, "stock_count": stock_count}
         
@@ -389,83 +636,67 @@ def create_hive_tables(**context):
 # TASK 5: AGGREGATE ORDERS USING TRINO -> HDFS
 # =============================================================================
 
-def aggregate_orders_with_trino(**context):
+@with_execution_date
+def aggregate_orders_with_trino(date_str: str, date_str_iso: str, **context):
     """Aggregate orders using Trino federated queries and store to HDFS"""
     logging.info("Aggregating orders using Trino...")
     
-    execution_date = context.get('execution_date') or context.get('logical_date') or datetime.now()
-    if hasattr(execution_date, 'to_pydatetime'):
-        execution_date = execution_date.to_pydatetime()
-    
-    date_str = execution_date.strftime(DATE_FORMAT)
-    
     try:
         ti = context['ti']
         
         conn = get_trino_connection()
         cursor = conn.cursor()
         
+        aggregated_orders_table = f"{TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.aggregated_orders"
+        
+        # Materialize the federated aggregation so downstream tasks read one Parquet table
+        cursor.execute(f"DROP TABLE IF EXISTS {aggregated_orders_table}")
+        
         aggregate_sql = f"""
+            CREATE TABLE {aggregated_orders_table}
+            WITH (format = 'PARQUET')
+            AS
             SELECT 
-                CAST(o.sku_id AS BIGINT) as sku_id,
+                o.sku_id,
                 p.sku_code,
                 p.name AS product_name,
                 p.category,
-                CAST(o.warehouse_id AS BIGINT) as warehouse_id,
+                o.warehouse_id,
                 w.warehouse_code,
                 w.name AS warehouse_name,
                 w.city,
-                SUM(CAST(o.quantity AS BIGINT)) AS total_quantity,
+                SUM(o.quantity) AS total_quantity,
                 COUNT(*) AS order_count,
-                MAX(o.order_date) AS order_date
+                DATE '{date_str_iso}' AS order_date
             FROM {TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.orders o
-            JOIN {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.products p ON CAST(o.sku_id AS BIGINT) = p.sku_id
-            JOIN {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.warehouses w ON CAST(o.warehouse_id AS BIGINT) = w.warehouse_id
-            GROUP BY CAST(o.sku_id AS BIGINT), p.sku_code, p.name, p.category, CAST(o.warehouse_id AS BIGINT), w.warehouse_code, w.name, w.city
-            ORDER BY total_quantity DESC
+            JOIN {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.products p ON o.sku_id = p.sku_id
+            JOIN {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.warehouses w ON o.warehouse_id = w.warehouse_id
+            GROUP BY o.sku_id, p.sku_code, p.name, p.category, o.warehouse_id, w.warehouse_code, w.name, w.city
         """
         
         cursor.execute(aggregate_sql)
-        columns = [desc[0] for desc in cursor.description]
-        rows = cursor.fetchall()
-        aggregated_orders = [dict(zip(columns, row)) for row in rows]
-        
-        cursor.close()
-        conn.close()
-        
-        # Save to temporary local files
-        temp_dir = Path(f"{TEMP_PATH}/aggregated_orders/{date_str}")
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        
-        temp_json = temp_dir / "aggregated_orders.json"
-        with open(temp_json, 'w') as f:
-            json.dump(aggregated_orders, f, indent=2, default=str)
+        cursor.fetchall()
         
-        temp_csv = temp_dir / "aggregated_orders.csv"
-        if aggregated_orders:
-            with open(temp_csv, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=aggregated_orders[0].keys())
-                writer.writeheader()
-                writer.writerows(aggregated_orders)
-        
-        # Upload to HDFS
-        hdfs_hook = WebHDFSHook(webhdfs_conn_id=HDFS_CONN_ID)
-        hdfs_json_path = f"{HDFS_PROCESSED_PATH}/aggregated_orders/{date_str}/aggregated_orders.json"
+        # Stream results straight to HDFS (CSV + Parquet), no local temp files
+        hdfs_parquet_path = f"{HDFS_PROCESSED_PATH}/aggregated_orders/{date_str}/aggregated_orders.parquet"
         hdfs_csv_path = f"{HDFS_PROCESSED_PATH}/aggregated_orders/{date_str}/aggregated_orders.csv"
         
-        hdfs_hook.load_file(source=str(temp_json), destination=hdfs_json_path, overwrite=True)
-        hdfs_hook.load_file(source=str(temp_csv), destination=hdfs_csv_path, overwrite=True)
+        cursor.execute(f"SELECT * FROM {aggregated_orders_table}")
+        aggregated_count = export_query_results(cursor, hdfs_csv_path, hdfs_parquet_path)
+        
+        cursor.close()
+        conn.close()
         
         log_task_execution("aggregate_orders_with_trino", date_str, "success", {
-            "aggregated_count": len(aggregated_orders),
-            "hdfs_json_path": hdfs_json_path,
+            "aggregated_count": aggregated_count,
+            "hdfs_parquet_path": hdfs_parquet_path,
             "hdfs_csv_path": hdfs_csv_path
         }, context)
         
-        ti.xcom_push(key='aggregated_orders_file', value=hdfs_json_path)
-        ti.xcom_push(key='aggregated_orders_count', value=len(aggregated_orders))
+        ti.xcom_push(key='aggregated_orders_file', value=hdfs_parquet_path)
+        ti.xcom_push(key='aggregated_orders_count', value=aggregated_count)
         
-        return {"status": "success", "aggregated_count": len(aggregated_orders)}
+        return {"status": "success", "aggregated_count": aggregated_count}
         
     except Exception as e:
         log_exception(e, "aggregate_orders_with_trino", date_str, {"stage": "aggregation"})
@@ -475,16 +706,67 @@ def aggregate_orders_with_trino(**context):
 # TASK 6: CALCULATE NET DEMAND USING TRINO -> HDFS
 # =============================================================================
 
-def calculate_net_demand_with_trino(**context):
-    """Calculate net demand using Trino federated queries and store to HDFS"""
-    logging.info("Calculating net demand using Trino...")
+def stage_inventory_snapshots(cursor, date_str: str, snapshot_date) -> int:
+    """Point-read today's Cassandra snapshots for ordered SKU/warehouse pairs into a Hive table"""
+    # Only the (sku_code, warehouse_code) pairs that appear in today's orders matter
+    cursor.execute(f"""
+        SELECT DISTINCT sku_code, warehouse_code
+        FROM {TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.aggregated_orders
+    """)
+    pairs = cursor.fetchall()
     
-    execution_date = context.get('execution_date') or context.get('logical_date') or datetime.now()
-    if hasattr(execution_date, 'to_pydatetime'):
-        execution_date = execution_date.to_pydatetime()
+    cassandra_hook = CassandraHook(cassandra_conn_id=CASSANDRA_CONN_ID)
+    session = cassandra_hook.get_conn()
+    session.default_timeout = CASSANDRA_REQUEST_TIMEOUT
+    
+    select_stmt = session.prepare(f"""
+        SELECT sku_code, warehouse_code, available_qty, reserved_qty
+        FROM {CASSANDRA_KEYSPACE}.{CASSANDRA_TABLE}
+        WHERE sku_code = ? AND snapshot_date = ? AND warehouse_code = ?
+    """)
+    
+    # Full primary key lookups: one partition, one row each
+    results = execute_concurrent_with_args(
+        session, select_stmt,
+        [(sku_code, snapshot_date, warehouse_code) for sku_code, warehouse_code in pairs],
+        concurrency=CASSANDRA_WRITE_CONCURRENCY
+    )
+    inventory_rows = (
+        (row.sku_code, row.warehouse_code, row.available_qty, row.reserved_qty)
+        for _, rows in results for row in rows
+    )
     
-    date_str = execution_date.strftime(DATE_FORMAT)
-    date_str_iso = execution_date.strftime("%Y-%m-%d")
+    hdfs_inventory_dir = f"{HDFS_PROCESSED_PATH}/inventory_snapshots/{date_str}"
+    staged_count = write_csv_to_hdfs(
+        f"{hdfs_inventory_dir}/inventory_snapshots.csv",
+        ['sku_code', 'warehouse_code', 'available_qty', 'reserved_qty'],
+        inventory_rows
+    )
+    
+    inventory_table = f"{TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.inventory_snapshots"
+    cursor.execute(f"DROP TABLE IF EXISTS {inventory_table}")
+    cursor.execute(f"""
+        CREATE TABLE {inventory_table} (
+            sku_code VARCHAR,
+            warehouse_code VARCHAR,
+            available_qty INTEGER,
+            reserved_qty INTEGER
+        )
+        WITH (
+            format = 'TEXTFILE',
+            textfile_field_separator = ',',
+            external_location = 'hdfs://namenode:9000{hdfs_inventory_dir}',
+            skip_header_line_count = 1
+        )
+    """)
+    
+    return staged_count
+
+
+@with_execution_date
+def calculate_net_demand_with_trino(date_str: str, date_str_iso: str, **context):
+    """Calculate net demand using Trino federated queries and store to HDFS"""
+    logging.info("Calculating net demand using Trino...")
     
     try:
         ti = context['ti']
@@ -492,240 +774,268 @@ def calculate_net_demand_with_trino(**context):
         conn = get_trino_connection()
         cursor = conn.cursor()
         
+        inventory_count = stage_inventory_snapshots(cursor, date_str, date.fromisoformat(date_str_iso))
+        
+        net_demand_table = f"{TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.net_demand"
+        
+        # Materialize net demand once so detail rows and totals are both read from Trino
+        cursor.execute(f"DROP TABLE IF EXISTS {net_demand_table}")
+        
         net_demand_sql = f"""
-            WITH aggregated_orders AS (
-                SELECT 
-                    CAST(o.sku_id AS BIGINT) as sku_id, p.sku_code, p.name AS product_name, p.category,
-                    CAST(o.warehouse_id AS BIGINT) as warehouse_id, w.warehouse_code, w.name AS warehouse_name, w.city,
-                    SUM(CAST(o.quantity AS BIGINT)) AS total_quantity
-                FROM {TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.orders o
-                JOIN {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.products p ON CAST(o.sku_id AS BIGINT) = p.sku_id
-                JOIN {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.warehouses w ON CAST(o.warehouse_id AS BIGINT) = w.warehouse_id
-                GROUP BY CAST(o.sku_id AS BIGINT), p.sku_code, p.name, p.category, CAST(o.warehouse_id AS BIGINT), w.warehouse_code, w.name, w.city
-            ),
-            safety_stock_combined AS (
-                SELECT 
-                    COALESCE(ssw.sku_id, ss.sku_id) AS sku_id,
-                    COALESCE(ssw.warehouse_id, w.warehouse_id) AS warehouse_id,
-                    COALESCE(ssw.safety_stock_qty, ss.safety_stock_qty, 0) AS safety_stock_qty
-                FROM {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.safety_stock ss
-                CROSS JOIN {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.warehouses w
-                LEFT JOIN {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.safety_stock_by_warehouse ssw
-                    ON ss.sku_id = ssw.sku_id AND w.warehouse_id = ssw.warehouse_id
-            ),
-            inventory_data AS (
+            CREATE TABLE {net_demand_table}
+            WITH (format = 'PARQUET')
+            AS
+            WITH inventory_data AS (
                 SELECT sku_code, warehouse_code, available_qty, reserved_qty
-                FROM {TRINO_CATALOG_CASSANDRA}.{CASSANDRA_KEYSPACE}.{CASSANDRA_TABLE}
-                WHERE snapshot_date = DATE '{date_str_iso}'
+                FROM {TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.inventory_snapshots
             )
             SELECT 
                 ao.sku_id, ao.sku_code, ao.product_name, ao.category,
                 ao.warehouse_id, ao.warehouse_code, ao.warehouse_name, ao.city,
                 ao.total_quantity AS aggregated_orders,
-                COALESCE(ss.safety_stock_qty, 0) AS safety_stock,
+                COALESCE(ssw.safety_stock_qty, ss.safety_stock_qty, 0) AS safety_stock,
                 COALESCE(inv.available_qty, 0) AS available_stock,
                 COALESCE(inv.reserved_qty, 0) AS reserved_stock,
                 COALESCE(inv.available_qty, 0) - COALESCE(inv.reserved_qty, 0) AS effective_stock,
                 GREATEST(0, 
-                    ao.total_quantity + COALESCE(ss.safety_stock_qty, 0) 
+                    ao.total_quantity + COALESCE(ssw.safety_stock_qty, ss.safety_stock_qty, 0) 
                     - (COALESCE(inv.available_qty, 0) - COALESCE(inv.reserved_qty, 0))
-                ) AS net_demand
-            FROM aggregated_orders ao
-            LEFT JOIN safety_stock_combined ss ON ao.sku_id = ss.sku_id AND ao.warehouse_id = ss.warehouse_id
+                ) AS net_demand,
+                '{date_str}' AS calculation_date
+            FROM {TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.aggregated_orders ao
+            -- Warehouse-level safety stock overrides the global per-SKU level
+            LEFT JOIN {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.safety_stock_by_warehouse ssw
+                ON ao.sku_id = ssw.sku_id AND ao.warehouse_id = ssw.warehouse_id
+            LEFT JOIN {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.safety_stock ss ON ao.sku_id = ss.sku_id
             LEFT JOIN inventory_data inv ON ao.sku_code = inv.sku_code AND ao.warehouse_code = inv.warehouse_code
-            ORDER BY net_demand DESC
         """
         
         cursor.execute(net_demand_sql)
-        columns = [desc[0] for desc in cursor.description]
-        rows = cursor.fetchall()
-        net_demand_results = [dict(zip(columns, row)) for row in rows]
-        
-        for result in net_demand_results:
-            result['calculation_date'] = date_str
+        cursor.fetchall()
         
-        cursor.close()
-        conn.close()
-        
-        # Save to temporary local files
-        temp_dir = Path(f"{TEMP_PATH}/net_demand/{date_str}")
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        
-        temp_json = temp_dir / "net_demand.json"
-        with open(temp_json, 'w') as f:
-            json.dump(net_demand_results, f, indent=2, default=str)
-        
-        temp_csv = temp_dir / "net_demand.csv"
-        if net_demand_results:
-            with open(temp_csv, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=net_demand_results[0].keys())
-                writer.writeheader()
-                writer.writerows(net_demand_results)
+        cursor.execute(f"""
+            SELECT COUNT(*), COALESCE(SUM(net_demand), 0), COUNT_IF(net_demand > 0)
+            FROM {net_demand_table}
+        """)
+        net_demand_count, total_net_demand, items_with_demand = cursor.fetchone()
         
-        # Upload to HDFS
-        hdfs_hook = WebHDFSHook(webhdfs_conn_id=HDFS_CONN_ID)
-        hdfs_json_path = f"{HDFS_PROCESSED_PATH}/net_demand/{date_str}/net_demand.json"
+        # Stream results straight to HDFS (CSV + Parquet), no local temp files
+        hdfs_parquet_path = f"{HDFS_PROCESSED_PATH}/net_demand/{date_str}/net_demand.parquet"
         hdfs_csv_path = f"{HDFS_PROCESSED_PATH}/net_demand/{date_str}/net_demand.csv"
         
-        hdfs_hook.load_file(source=str(temp_json), destination=hdfs_json_path, overwrite=True)
-        hdfs_hook.load_file(source=str(temp_csv), destination=hdfs_csv_path, overwrite=True)
+        cursor.execute(f"SELECT * FROM {net_demand_table}")
+        export_query_results(cursor, hdfs_csv_path, hdfs_parquet_path)
         
-        total_net_demand = sum(r['net_demand'] for r in net_demand_results)
-        items_with_demand = len([r for r in net_demand_results if r['net_demand'] > 0])
+        cursor.close()
+        conn.close()
         
         log_task_execution("calculate_net_demand_with_trino", date_str, "success", {
-            "total_combinations": len(net_demand_results),
+            "total_combinations": net_demand_count,
+            "inventory_snapshots_staged": inventory_count,
             "items_with_demand": items_with_demand,
             "total_net_demand": total_net_demand,
-            "hdfs_json_path": hdfs_json_path,
+            "hdfs_parquet_path": hdfs_parquet_path,
             "hdfs_csv_path": hdfs_csv_path
         }, context)
         
-        ti.xcom_push(key='net_demand_file', value=hdfs_json_path)
-        ti.xcom_push(key='net_demand_count', value=len(net_demand_results))
+        ti.xcom_push(key='net_demand_file', value=hdfs_parquet_path)
+        ti.xcom_push(key='net_demand_count', value=net_demand_count)
         ti.xcom_push(key='total_net_demand', value=total_net_demand)
         ti.xcom_push(key='items_with_demand', value=items_with_demand)
         
-        return {"status": "success", "net_demand_items": len(net_demand_results)}
+        return {"status": "success", "net_demand_items": net_demand_count}
         
     except Exception as e:
         log_exception(e, "calculate_net_demand_with_trino", date_str, {"stage": "net_demand_calculation"})
 
 
+# =============================================================================
+# SUPPLIER CATALOG CACHE: CHEAPEST SUPPLIER PER SKU (HIVE)
+# =============================================================================
+
+@with_execution_date
+def refresh_cheapest_suppliers(date_str: str, date_str_iso: str, **context):
+    """Rebuild the cached cheapest-supplier-per-SKU Hive table only when the supplier catalog changed"""
+    logging.info("Checking supplier catalog for changes...")
+    
+    try:
+        ti = context['ti']
+        
+        conn = get_trino_connection()
+        cursor = conn.cursor()
+        
+        cheapest_suppliers_table = f"{TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.cheapest_suppliers"
+        active_catalog_sql = f"""
+            FROM {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.supplier_products sp
+            JOIN {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.suppliers s ON sp.supplier_id = s.supplier_id
+            WHERE sp.is_active = TRUE AND s.is_active = TRUE AND sp.unit_price IS NOT NULL
+        """
+        
+        # Order-insensitive checksum over every cached attribute of the active catalog rows:
+        # in-place price edits and active-flag swaps change it even when updated_at does not
+        cursor.execute(f"""
+            SELECT COALESCE(to_hex(checksum(ROW(
+                sp.supplier_id, sp.sku_id, sp.unit_price, sp.pack_size, sp.min_order_qty,
+                sp.lead_time_days, sp.currency, s.supplier_code, s.name
+            ))), 'none')
+            {active_catalog_sql}
+        """)
+        catalog_version = cursor.fetchone()[0]
+        
+        try:
+            cursor.execute(f"SELECT MAX(catalog_version) FROM {cheapest_suppliers_table}")
+            cached_version = cursor.fetchone()[0]
+        except TrinoUserError:
+            cached_version = None  # first run: table does not exist yet
+        
+        refreshed = cached_version != catalog_version
+        if refreshed:
+            cursor.execute(f"DROP TABLE IF EXISTS {cheapest_suppliers_table}")
+            cursor.execute(f"""
+                CREATE TABLE {cheapest_suppliers_table}
+                WITH (format = 'PARQUET')
+                AS
+                -- One aggregation pass per SKU; (unit_price, supplier_id) is unique, so every MIN_BY picks the same row
+                SELECT 
+                    sp.sku_id,
+                    MIN_BY(sp.supplier_id, ROW(sp.unit_price, sp.supplier_id)) AS supplier_id,
+                    MIN_BY(s.supplier_code, ROW(sp.unit_price, sp.supplier_id)) AS supplier_code,
+                    MIN_BY(s.name, ROW(sp.unit_price, sp.supplier_id)) AS supplier_name,
+                    MIN_BY(sp.pack_size, ROW(sp.unit_price, sp.supplier_id)) AS pack_size,
+                    MIN_BY(sp.min_order_qty, ROW(sp.unit_price, sp.supplier_id)) AS min_order_qty,
+                    MIN_BY(sp.lead_time_days, ROW(sp.unit_price, sp.supplier_id)) AS lead_time_days,
+                    MIN_BY(sp.currency, ROW(sp.unit_price, sp.supplier_id)) AS currency,
+                    MIN(sp.unit_price) AS unit_price,
+                    '{catalog_version}' AS catalog_version
+                {active_catalog_sql}
+                GROUP BY sp.sku_id
+            """)
+            cursor.fetchall()
+            logging.info(f"Supplier catalog changed, rebuilt {cheapest_suppliers_table} ({catalog_version})")
+        else:
+            logging.info(f"Supplier catalog unchanged, reusing {cheapest_suppliers_table} ({catalog_version})")
+        
+        cursor.close()
+        conn.close()
+        
+        log_task_execution("refresh_cheapest_suppliers", date_str, "success", {
+            "catalog_version": catalog_version,
+            "refreshed": refreshed
+        }, context)
+        
+        ti.xcom_push(key='cheapest_suppliers_refreshed', value=refreshed)
+        
+        return {"status": "success", "refreshed": refreshed}
+        
+    except Exception as e:
+        log_exception(e, "refresh_cheapest_suppliers", date_str, {"stage": "supplier_catalog_cache"})
+
+
 # =============================================================================
 # TASK 7: GENERATE SUPPLIER ORDERS USING TRINO -> HDFS
 # =============================================================================
 
-def generate_supplier_orders_with_trino(**context):
+@with_execution_date
+def generate_supplier_orders_with_trino(date_str: str, date_str_iso: str, **context):
     """Generate supplier orders using Trino federated queries and store to HDFS"""
     logging.info("Generating supplier orders using Trino...")
     
-    execution_date = context.get('execution_date') or context.get('logical_date') or datetime.now()
-    if hasattr(execution_date, 'to_pydatetime'):
-        execution_date = execution_date.to_pydatetime()
-    
-    date_str = execution_date.strftime(DATE_FORMAT)
-    date_str_iso = execution_date.strftime("%Y-%m-%d")
-    
     try:
         ti = context['ti']
         
         conn = get_trino_connection()
         cursor = conn.cursor()
         
+        po_prefix = f"PO-{date_str_iso.replace('-', '')}"
+        
+        # Net demand was materialized by calculate_net_demand; the cheapest supplier per SKU
+        # comes from the cached catalog table kept by refresh_cheapest_suppliers
         supplier_orders_sql = f"""
-            WITH aggregated_orders AS (
-                SELECT 
-                    CAST(o.sku_id AS BIGINT) as sku_id, p.sku_code, p.name AS product_name, p.category,
-                    CAST(o.warehouse_id AS BIGINT) as warehouse_id, w.warehouse_code, w.name AS warehouse_name, w.city,
-                    SUM(CAST(o.quantity AS BIGINT)) AS total_quantity
-                FROM {TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.orders o
-                JOIN {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.products p ON CAST(o.sku_id AS BIGINT) = p.sku_id
-                JOIN {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.warehouses w ON CAST(o.warehouse_id AS BIGINT) = w.warehouse_id
-                GROUP BY CAST(o.sku_id AS BIGINT), p.sku_code, p.name, p.category, CAST(o.warehouse_id AS BIGINT), w.warehouse_code, w.name, w.city
-            ),
-            safety_stock_combined AS (
-                SELECT 
-                    COALESCE(ssw.sku_id, ss.sku_id) AS sku_id,
-                    COALESCE(ssw.warehouse_id, w.warehouse_id) AS warehouse_id,
-                    COALESCE(ssw.safety_stock_qty, ss.safety_stock_qty, 0) AS safety_stock_qty
-                FROM {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.safety_stock ss
-                CROSS JOIN {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.warehouses w
-                LEFT JOIN {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.safety_stock_by_warehouse ssw
-                    ON ss.sku_id = ssw.sku_id AND w.warehouse_id = ssw.warehouse_id
-            ),
-            inventory_data AS (
-                SELECT sku_code, warehouse_code, available_qty, reserved_qty
-                FROM {TRINO_CATALOG_CASSANDRA}.{CASSANDRA_KEYSPACE}.{CASSANDRA_TABLE}
-                WHERE snapshot_date = DATE '{date_str_iso}'
-            ),
-            net_demand_calc AS (
-                SELECT 
-                    ao.sku_id, ao.sku_code, ao.product_name, ao.category,
-                    ao.warehouse_id, ao.warehouse_code, ao.warehouse_name, ao.city,
-                    GREATEST(0, 
-                        ao.total_quantity + COALESCE(ss.safety_stock_qty, 0) 
-                        - (COALESCE(inv.available_qty, 0) - COALESCE(inv.reserved_qty, 0))
-                    ) AS net_demand
-                FROM aggregated_orders ao
-                LEFT JOIN safety_stock_combined ss ON ao.sku_id = ss.sku_id AND ao.warehouse_id = ss.warehouse_id
-                LEFT JOIN inventory_data inv ON ao.sku_code = inv.sku_code AND ao.warehouse_code = inv.warehouse_code
-            ),
-            ranked_suppliers AS (
+            WITH sized_orders AS (
                 SELECT 
-                    sp.supplier_id, s.supplier_code, s.name AS supplier_name, sp.sku_id,
-                    sp.pack_size, sp.min_order_qty, sp.lead_time_days, sp.unit_price, sp.currency,
-                    ROW_NUMBER() OVER (PARTITION BY sp.sku_id ORDER BY sp.unit_price ASC) AS price_rank
-                FROM {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.supplier_products sp
-                JOIN {TRINO_CATALOG_POSTGRES}.{TRINO_SCHEMA_POSTGRES}.suppliers s ON sp.supplier_id = s.supplier_id
-                WHERE sp.is_active = TRUE AND s.is_active = TRUE
+                    nd.sku_id, nd.sku_code, nd.product_name, nd.category,
+                    nd.warehouse_id, nd.warehouse_code, nd.warehouse_name, nd.city,
+                    rs.supplier_id, rs.supplier_code, rs.supplier_name,
+                    nd.net_demand, rs.pack_size, rs.min_order_qty, rs.unit_price, rs.currency, rs.lead_time_days,
+                    -- Round up to whole packs in integer arithmetic (net_demand > 0)
+                    GREATEST(rs.min_order_qty, ((nd.net_demand + rs.pack_size - 1) / rs.pack_size) * rs.pack_size) AS order_quantity
+                FROM {TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.net_demand nd
+                JOIN {TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.cheapest_suppliers rs ON nd.sku_id = rs.sku_id
+                WHERE nd.net_demand > 0
             )
             SELECT 
-                nd.sku_id, nd.sku_code, nd.product_name, nd.category,
-                nd.warehouse_id, nd.warehouse_code, nd.warehouse_name, nd.city,
-                rs.supplier_id, rs.supplier_code, rs.supplier_name,
-                nd.net_demand, rs.pack_size, rs.min_order_qty, rs.unit_price, rs.currency, rs.lead_time_days,
-                GREATEST(rs.min_order_qty, CEILING(CAST(nd.net_demand AS DOUBLE) / rs.pack_size) * rs.pack_size) AS order_quantity,
-                GREATEST(rs.min_order_qty, CEILING(CAST(nd.net_demand AS DOUBLE) / rs.pack_size) * rs.pack_size) * rs.unit_price AS total_cost,
-                DATE_ADD('day', rs.lead_time_days, DATE '{date_str_iso}') AS expected_delivery_date
-            FROM net_demand_calc nd
-            JOIN ranked_suppliers rs ON nd.sku_id = rs.sku_id AND rs.price_rank = 1
-            WHERE nd.net_demand > 0
-            ORDER BY total_cost DESC
+                *,
+                CAST(order_quantity * unit_price AS DOUBLE) AS total_cost,
+                DATE_ADD('day', lead_time_days, DATE '{date_str_iso}') AS expected_delivery_date,
+                -- Stable PO numbers across reruns: most expensive line first, ties broken by the (sku, warehouse) key
+                format('{po_prefix}-%05d', ROW_NUMBER() OVER (
+                    ORDER BY order_quantity * unit_price DESC, sku_id, warehouse_id
+                )) AS order_id
+            FROM sized_orders
         """
         
         cursor.execute(supplier_orders_sql)
-        columns = [desc[0] for desc in cursor.description]
-        rows = cursor.fetchall()
-        
-        supplier_orders = []
-        for i, row in enumerate(rows, 1):
-            order_dict = dict(zip(columns, row))
-            order_dict['order_id'] = f"PO-{date_str_iso.replace('-', '')}-{i:05d}"
-            order_dict['order_date'] = date_str_iso
-            order_dict['status'] = 'PENDING'
-            supplier_orders.append(order_dict)
+        query_schema = arrow_schema_from_description(cursor.description)
+        schema = (query_schema
+                  .append(pa.field('order_date', pa.string()))
+                  .append(pa.field('status', pa.string())))
+        
+        order_count = 0
+        total_cost = 0.0
+        
+        hdfs_orders_dir = f"{HDFS_OUTPUT_PATH}/supplier_orders/{date_str}"
+        hdfs_parquet_path = f"{hdfs_orders_dir}/supplier_orders.parquet"
+        
+        # Single columnar output streamed to HDFS as rows arrive; memory stays at one batch plus the write buffer
+        with open_hdfs_parquet_writer(hdfs_parquet_path, schema) as parquet_writer:
+            for batch in fetch_in_batches(cursor):
+                query_batch = rows_to_record_batch(batch, query_schema)
+                batch_size = len(batch)
+                orders = pa.RecordBatch.from_arrays(
+                    query_batch.columns + [
+                        pa.repeat(date_str_iso, batch_size),
+                        pa.repeat('PENDING', batch_size),
+                    ],
+                    schema=schema
+                )
+                parquet_writer.write_batch(orders)
+                order_count += batch_size
+                total_cost += float(pc.sum(orders.column('total_cost')).as_py() or 0)
+        
+        # Expose the day's orders to Trino as an external Parquet table
+        # Same type mapping as the Parquet schema, so the DDL always matches the file
+        column_ddl = ",\n                ".join(
+            f"{name} {map_trino_type(type_code, precision, scale)[0]}"
+            for name, type_code, _, _, precision, scale, _ in cursor.description
+        )
+        supplier_orders_table = f"{TRINO_CATALOG_HIVE}.{TRINO_SCHEMA_HIVE}.supplier_orders"
+        cursor.execute(f"DROP TABLE IF EXISTS {supplier_orders_table}")
+        cursor.execute(f"""
+            CREATE TABLE {supplier_orders_table} (
+                {column_ddl},
+                order_date VARCHAR,
+                status VARCHAR
+            )
+            WITH (
+                format = 'PARQUET',
+                external_location = 'hdfs://namenode:9000{hdfs_orders_dir}'
+            )
+        """)
         
         cursor.close()
         conn.close()
         
-        # Save to local files
-        output_dir = Path(f"{OUTPUT_PATH}/supplier_orders/{date_str}")
-        output_dir.mkdir(parents=True, exist_ok=True)
-        
-        output_json = output_dir / "supplier_orders.json"
-        with open(output_json, 'w') as f:
-            json.dump(supplier_orders, f, indent=2, default=str)
-        
-        output_csv = output_dir / "supplier_orders.csv"
-        if supplier_orders:
-            with open(output_csv, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=supplier_orders[0].keys())
-                writer.writeheader()
-                writer.writerows(supplier_orders)
-        
-        # Upload to HDFS
-        hdfs_hook = WebHDFSHook(webhdfs_conn_id=HDFS_CONN_ID)
-        hdfs_json_path = f"{HDFS_OUTPUT_PATH}/supplier_orders/{date_str}/supplier_orders.json"
-        hdfs_csv_path = f"{HDFS_OUTPUT_PATH}/supplier_orders/{date_str}/supplier_orders.csv"
-        
-        hdfs_hook.load_file(source=str(output_json), destination=hdfs_json_path, overwrite=True)
-        hdfs_hook.load_file(source=str(output_csv), destination=hdfs_csv_path, overwrite=True)
-        
-        total_cost = sum(float(o['total_cost']) for o in supplier_orders)
-        
         log_task_execution("generate_supplier_orders_with_trino", date_str, "success", {
-            "orders_generated": len(supplier_orders),
+            "orders_generated": order_count,
             "total_cost": total_cost,
-            "hdfs_json_path": hdfs_json_path,
-            "hdfs_csv_path": hdfs_csv_path
+            "hdfs_parquet_path": hdfs_parquet_path
         }, context)
         
-        ti.xcom_push(key='supplier_orders_file', value=hdfs_json_path)
-        ti.xcom_push(key='supplier_orders_count', value=len(supplier_orders))
+        ti.xcom_push(key='supplier_orders_file', value=hdfs_parquet_path)
+        ti.xcom_push(key='supplier_orders_count', value=order_count)
         ti.xcom_push(key='total_procurement_cost', value=total_cost)
         
-        return {"status": "success", "orders_generated": len(supplier_orders), "total_cost": total_cost}
+        return {"status": "success", "orders_generated": order_count, "total_cost": total_cost}
         
     except Exception as e:
         log_exception(e, "generate_supplier_orders_with_trino", date_str, {"stage": "supplier_order_generation"})
@@ -735,56 +1045,47 @@ def generate_supplier_orders_with_trino(**context):
 # TASK 8: PIPELINE SUMMARY -> HDFS
 # =============================================================================
 
-def generate_pipeline_summary(**context):
+@with_execution_date
+def generate_pipeline_summary(date_str: str, date_str_iso: str, **context):
     """Generate comprehensive pipeline execution summary and store to HDFS"""
     logging.info("Generating pipeline summary...")
     
-    execution_date = context.get('execution_date') or context.get('logical_date') or datetime.now()
-    if hasattr(execution_date, 'to_pydatetime'):
-        execution_date = execution_date.to_pydatetime()
-    
-    date_str = execution_date.strftime(DATE_FORMAT)
-    
     try:
         ti = context['ti']
         
+        # One metadata-DB query for the whole run instead of one per key
+        xcom = get_run_xcom_reader(ti, context['run_id'])
+        
         summary = {
             "execution_date": date_str,
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "status": "completed",
             "hive_tables": {
-                "orders_count": ti.xcom_pull(task_ids='create_hive_tables', key='orders_count') or 0,
-                "stock_count": ti.xcom_pull(task_ids='create_hive_tables', key='stock_count') or 0
+                "orders_count": xcom('create_hive_tables', 'orders_count') or 0,
+                "stock_count": xcom('create_hive_tables', 'stock_count') or 0
             },
             "cassandra": {
-                "snapshots_inserted": ti.xcom_pull(task_ids='store_snapshots', key='cassandra_inserted_count') or 0
+                "snapshots_inserted": xcom('store_snapshots', 'cassandra_inserted_count') or 0
             },
             "aggregation": {
-                "combinations": ti.xcom_pull(task_ids='aggregate_orders', key='aggregated_orders_count') or 0
+                "combinations": xcom('aggregate_orders', 'aggregated_orders_count') or 0
             },
             "net_demand": {
-                "combinations": ti.xcom_pull(task_ids='calculate_net_demand', key='net_demand_count') or 0,
-                "items_with_demand": ti.xcom_pull(task_ids='calculate_net_demand', key='items_with_demand') or 0,
-                "total_quantity": ti.xcom_pull(task_ids='calculate_net_demand', key='total_net_demand') or 0
+                "combinations": xcom('calculate_net_demand', 'net_demand_count') or 0,
+                "items_with_demand": xcom('calculate_net_demand', 'items_with_demand') or 0,
+                "total_quantity": xcom('calculate_net_demand', 'total_net_demand') or 0
             },
             "supplier_orders": {
-                "orders_generated": ti.xcom_pull(task_ids='generate_supplier_orders', key='supplier_orders_count') or 0,
-                "total_cost": ti.xcom_pull(task_ids='generate_supplier_orders', key='total_procurement_cost') or 0
+                "orders_generated": xcom('generate_supplier_orders', 'supplier_orders_count') or 0,
+                "total_cost": xcom('generate_supplier_orders', 'total_procurement_cost') or 0
             }
         }
         
-        # Save to local file
-        summary_dir = Path(f"{OUTPUT_PATH}/pipeline_summary")
-        summary_dir.mkdir(parents=True, exist_ok=True)
-        
-        summary_file = summary_dir / f"summary_{date_str}.json"
-        with open(summary_file, 'w') as f:
-            json.dump(summary, f, indent=2)
-        
-        # Upload to HDFS
-        hdfs_hook = WebHDFSHook(webhdfs_conn_id=HDFS_CONN_ID)
+        # Write straight to HDFS
+        hdfs_client = get_hdfs_client()
         hdfs_summary_path = f"{HDFS_LOGS_PATH}/summaries/summary_{date_str}.json"
-        hdfs_hook.load_file(source=str(summary_file), destination=hdfs_summary_path, overwrite=True)
+        hdfs_client.write(hdfs_summary_path, data=orjson.dumps(summary, default=str),
+                          overwrite=True, buffersize=HDFS_BUFFER_SIZE)
         
         logging.info("=" * 70)
         logging.info("PIPELINE SUMMARY")
@@ -813,62 +1114,79 @@ default_args = {
 with DAG(
     dag_id='procurement_daily_pipeline_sequential',
     default_args=default_args,
-    description='Daily procurement ETL pipeline (Sequential execution): Load → HDFS/Cassandra → Hive → Trino → Supplier orders (all to HDFS)',
+    description='Daily procurement ETL pipeline: parallel Load → HDFS/Cassandra, then Hive → Trino → Supplier orders (all to HDFS)',
     schedule_interval='0 23 * * *',
     start_date=datetime(2026, 1, 1),
     catchup=False,
-    tags=['procurement', 'etl', 'trino', 'hive', 'sequential', 'hdfs'],
+    tags=['procurement', 'etl', 'trino', 'hive', 'hdfs'],
     max_active_runs=1,
-    max_active_tasks=1,
+    max_active_tasks=4,
+    on_success_callback=flush_logs_to_hdfs,
+    on_failure_callback=flush_logs_to_hdfs,
 ) as dag:
     
     # Task 1: Load orders to HDFS
     load_orders_task = PythonOperator(
         task_id='load_orders',
         python_callable=load_orders_to_hdfs,
-        provide_context=True
+        provide_context=True,
+        pool=INGEST_POOL
     )
     
-    # Task 2: Load stock to HDFS (runs after load_orders)
+    # Task 2: Load stock to HDFS (runs in parallel with tasks 1 and 3)
     load_stock_task = PythonOperator(
         task_id='load_stock',
         python_callable=load_stock_to_hdfs,
-        provide_context=True
+        provide_context=True,
+        pool=INGEST_POOL
     )
     
-    # Task 3: Store snapshots to Cassandra (runs after load_stock)
+    # Task 3: Store snapshots to Cassandra (runs in parallel with tasks 1 and 2)
     store_snapshots_task = PythonOperator(
         task_id='store_snapshots',
         python_callable=store_snapshots_to_cassandra,
-        provide_context=True
+        provide_context=True,
+        pool=CASSANDRA_POOL
     )
     
-    # Task 4: Create Hive tables (runs after store_snapshots)
+    # Task 4: Create Hive tables (runs after all ingest tasks)
     create_hive_tables_task = PythonOperator(
         task_id='create_hive_tables',
         python_callable=create_hive_tables,
-        provide_context=True
+        provide_context=True,
+        pool=TRINO_POOL
     )
     
     # Task 5: Aggregate orders (runs after create_hive_tables)
     aggregate_orders_task = PythonOperator(
         task_id='aggregate_orders',
         python_callable=aggregate_orders_with_trino,
-        provide_context=True
+        provide_context=True,
+        pool=TRINO_POOL
     )
     
     # Task 6: Calculate net demand (runs after aggregate_orders)
     calculate_net_demand_task = PythonOperator(
         task_id='calculate_net_demand',
         python_callable=calculate_net_demand_with_trino,
-        provide_context=True
+        provide_context=True,
+        pool=TRINO_POOL
+    )
+    
+    # Refresh the cheapest-supplier cache (runs alongside tasks 5-6)
+    refresh_cheapest_suppliers_task = PythonOperator(
+        task_id='refresh_cheapest_suppliers',
+        python_callable=refresh_cheapest_suppliers,
+        provide_context=True,
+        pool=TRINO_POOL
     )
     
-    # Task 7: Generate supplier orders (runs after calculate_net_demand)
+    # Task 7: Generate supplier orders (runs after calculate_net_demand and the supplier cache refresh)
     generate_supplier_orders_task = PythonOperator(
         task_id='generate_supplier_orders',
         python_callable=generate_supplier_orders_with_trino,
-        provide_context=True
+        provide_context=True,
+        pool=TRINO_POOL
     )
     
     # Task 8: Generate summary (runs after generate_supplier_orders)
@@ -879,7 +1197,8 @@ with DAG(
         trigger_rule='all_done'
     )
     
-    # Define sequential execution: task1 >> task2 >> task3 >> task4 >> task5 >> task6 >> task7 >> task8
-    load_orders_task >> load_stock_task >> store_snapshots_task >> create_hive_tables_task
+    # Ingest tasks fan in to task4, then: task4 >> task5 >> task6 >> task7 >> task8
+    [load_orders_task, load_stock_task, store_snapshots_task] >> create_hive_tables_task
     create_hive_tables_task >> aggregate_orders_task >> calculate_net_demand_task
-    calculate_net_demand_task >> generate_supplier_orders_task >> generate_summary_task
\ No newline at end of file
+    calculate_net_demand_task >> generate_supplier_orders_task >> generate_summary_task
+    create_hive_tables_task >> refresh_cheapest_suppliers_task >> generate_supplier_orders_task
\ No newline at end of file
@@ -3,8 +3,10 @@ Create Airflow connections for the procurement system
 Run this after Airflow webserver/scheduler is running
 """
 
+import json
+
 from airflow.models import Connection
-from airflow.utils.db import merge_conn
+from airflow.utils.session import create_session
 
 # HDFS Connection
 hdfs_conn = Connection(
@@ -14,8 +16,6 @@ hdfs_conn = Connection(
     port=9000,
     extra='{"namenode_principal": "hdfs"}'
 )
-merge_conn(hdfs_conn)
-print("✓ Created HDFS connection: hdfs_default")
 
 # Cassandra Connection
 cassandra_conn = Connection(
@@ -23,10 +23,15 @@ cassandra_conn = Connection(
     conn_type='cassandra',
     host='cassandra1',
     port=9042,
-    extra='{"cluster_name": "procurement_cassandra_cluster"}'
+    extra=json.dumps({
+        "cluster_name": "procurement_cassandra_cluster",
+        "load_balancing_policy": "TokenAwarePolicy",
+        "load_balancing_policy_args": {
+            "child_load_balancing_policy": "DCAwareRoundRobinPolicy",
+            "child_load_balancing_policy_args": {"local_dc": "dc1"}
+        }
+    })
 )
-merge_conn(cassandra_conn)
-print("✓ Created Cassandra connection: cassandra_default")
 
 # Trino Connection
 trino_conn = Connection(
@@ -37,8 +42,6 @@ trino_conn = Connection(
     login='airflow',
     extra='{"catalog": "hive", "schema": "procurement"}'
 )
-merge_conn(trino_conn)
-print("✓ Created Trino connection: trino_default")
 
 # PostgreSQL Connection
 postgres_conn = Connection(
@@ -50,7 +53,15 @@ postgres_conn = Connection(
     password='admin123',
     schema='postgres'
 )
-merge_conn(postgres_conn)
-print("✓ Created PostgreSQL connection: postgres_default")
+
+# Upsert all connections in a single transaction (replaces stale definitions on restart)
+with create_session() as session:
+    for conn in (hdfs_conn, cassandra_conn, trino_conn, postgres_conn):
+        existing = session.query(Connection).filter_by(conn_id=conn.conn_id).first()
+        if existing:
+            session.delete(existing)
+            session.flush()
+        session.add(conn)
+        print(f"✓ Created {conn.conn_type} connection: {conn.conn_id}")
 
 print("\n✓ All connections created successfully!")
@@ -1,13 +1,14 @@
-import csv
-import json
-import random
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 # Configuration
 NUM_ORDERS = 1000
 TODAY = datetime.now()
+RNG = np.random.default_rng()
 BASE_PATH = Path(os.environ.get("DATA_PATH", "/opt/airflow/data"))
 OUTPUT_DIR = BASE_PATH / "raw/orders" / TODAY.strftime("%d-%m-%Y")
 OUTPUT_FILE = OUTPUT_DIR / "orders.csv"
@@ -61,61 +62,45 @@ HIGH_VOLUME_SKUS = [1, 2, 10, 11, 14, 15, 25]  # Office supplies, packaging
 MEDIUM_VOLUME_SKUS = [3, 4, 5, 17, 22, 29, 30, 40]  # IT, cleaning, electrical
 LOW_VOLUME_SKUS = [6, 8, 13, 19, 20, 35, 36]  # Expensive equipment
 
-def generate_order_id(index):
-    """Generate unique order ID"""
-    return f"ORD-{TODAY.strftime('%Y%m%d')}-{index:05d}"
+def generate_order_ids(count):
+    """Generate unique order IDs ORD-<date>-00001 .. ORD-<date>-<count>"""
+    sequence = np.char.zfill(np.arange(1, count + 1).astype(str), 5)
+    return np.char.add(f"ORD-{TODAY.strftime('%Y%m%d')}-", sequence)
 
 def calculate_quantity(sku_id, pack_size, min_order_qty):
-    """Calculate realistic order quantity based on SKU type and constraints"""
-    if sku_id in HIGH_VOLUME_SKUS:
-        multiplier = random.randint(2, 10)
-    elif sku_id in MEDIUM_VOLUME_SKUS:
-        multiplier = random.randint(1, 5)
-    else:
-        multiplier = random.choice([1, 1, 1, 2, 2, 3])
-    
-    base_qty = max(min_order_qty, multiplier * min_order_qty)
+    """Calculate realistic order quantities based on SKU type and constraints (one value per order)"""
+    size = len(sku_id)
+    multiplier = np.select(
+        [np.isin(sku_id, HIGH_VOLUME_SKUS), np.isin(sku_id, MEDIUM_VOLUME_SKUS)],
+        [RNG.integers(2, 11, size), RNG.integers(1, 6, size)],
+        default=RNG.choice([1, 1, 1, 2, 2, 3], size)
+    )
     
-    if random.random() < 0.8:
-        packs = max(1, base_qty // pack_size)
-        return packs * pack_size
+    base_qty = np.maximum(min_order_qty, multiplier * min_order_qty)
+    packs = np.maximum(1, base_qty // pack_size)
     
-    return base_qty
+    return np.where(RNG.random(size) < 0.8, packs * pack_size, base_qty)
 
 def generate_orders():
     """Generate realistic orders based on schema"""
-    orders = []
-    
-    for i in range(1, NUM_ORDERS + 1):
-        supplier_id, sku_id, pack_size, min_order_qty, lead_time_days, unit_price = random.choice(SUPPLIER_PRODUCTS)
-        
-        order_id = generate_order_id(i)
-        warehouse_id = random.choice(WAREHOUSES)
-        quantity = calculate_quantity(sku_id, pack_size, min_order_qty)
-        
-        order = {
-            'order_id': order_id,
-            'supplier_id': supplier_id,
-            'sku_id': sku_id,
-            'quantity': quantity,
-            'warehouse_id': warehouse_id,
-            'order_date': TODAY.strftime('%Y-%m-%d')
-        }
-        
-        orders.append(order)
+    supplier_products = np.array([row[:4] for row in SUPPLIER_PRODUCTS])
+    picks = RNG.integers(0, len(supplier_products), NUM_ORDERS)
+    supplier_id, sku_id, pack_size, min_order_qty = supplier_products[picks].T
     
-    return orders
+    return pd.DataFrame({
+        'order_id': generate_order_ids(NUM_ORDERS),
+        'supplier_id': supplier_id,
+        'sku_id': sku_id,
+        'quantity': calculate_quantity(sku_id, pack_size, min_order_qty),
+        'warehouse_id': RNG.choice(WAREHOUSES, NUM_ORDERS),
+        'order_date': TODAY.strftime('%Y-%m-%d')
+    })
 
 def save_orders_to_csv(orders):
     """Save orders to CSV file"""
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     
-    fieldnames = ['order_id', 'supplier_id', 'sku_id', 'quantity', 'warehouse_id', 'order_date']
-    
-    with open(OUTPUT_FILE, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(orders)
+    orders.to_csv(OUTPUT_FILE, index=False, encoding='utf-8')
     
     print(f"✓ Generated {len(orders)} orders")
     print(f"✓ Saved to: {OUTPUT_FILE}")
@@ -124,7 +109,7 @@ def save_orders_to_csv(orders):
 # ========== STOCK GENERATION ==========
 
 STOCK_OUTPUT_DIR = BASE_PATH / "raw/stock" / TODAY.strftime("%d-%m-%Y")
-STOCK_OUTPUT_FILE = STOCK_OUTPUT_DIR / "stock.json"
+STOCK_OUTPUT_FILE = STOCK_OUTPUT_DIR / "stock.ndjson"
 
 STOCK_WAREHOUSES = list(range(1, 11))
 STOCK_SKUS = list(range(1, 41))
@@ -149,43 +134,45 @@ GLOBAL_SAFETY_STOCK = {
     31: 100, 32: 100, 33: 250, 34: 10, 35: 1, 36: 1, 37: 50, 38: 5, 39: 3, 40: 100
 }
 
-def generate_current_stock(warehouse_id, sku_id):
-    """Generate realistic current stock level"""
-    safety_stock = WAREHOUSE_SAFETY_STOCK.get(warehouse_id, {}).get(sku_id, 
-                   GLOBAL_SAFETY_STOCK.get(sku_id, 10))
-    
-    multiplier = random.choice([
+# Dense lookups indexed [warehouse_id, sku_id]; -1 marks "no warehouse-level override"
+WAREHOUSE_OVERRIDES = np.full((max(STOCK_WAREHOUSES) + 1, max(STOCK_SKUS) + 1), -1)
+for _warehouse_id, _overrides in WAREHOUSE_SAFETY_STOCK.items():
+    WAREHOUSE_OVERRIDES[_warehouse_id, list(_overrides)] = list(_overrides.values())
+
+GLOBAL_SAFETY_STOCK_BY_SKU = np.full(max(STOCK_SKUS) + 1, 10)
+GLOBAL_SAFETY_STOCK_BY_SKU[list(GLOBAL_SAFETY_STOCK)] = list(GLOBAL_SAFETY_STOCK.values())
+
+SAFETY_STOCK_MATRIX = np.where(WAREHOUSE_OVERRIDES >= 0, WAREHOUSE_OVERRIDES, GLOBAL_SAFETY_STOCK_BY_SKU[None, :])
+
+def generate_current_stock(safety_stock):
+    """Generate realistic current stock levels from safety stock levels"""
+    multiplier = RNG.choice([
         0, 0.3, 0.5, 0.8, 1.0, 1.2, 1.5, 2.0, 2.5, 3.0
-    ])
+    ], len(safety_stock))
     
-    current = int(safety_stock * multiplier)
-    return max(0, current)
+    return np.maximum(0, (safety_stock * multiplier).astype(int))
 
 def generate_stock():
     """Generate stock data for all warehouse-SKU combinations"""
-    stock_data = []
+    warehouse_id, sku_id = (grid.ravel() for grid in np.meshgrid(STOCK_WAREHOUSES, STOCK_SKUS, indexing='ij'))
+    
+    has_override = WAREHOUSE_OVERRIDES[warehouse_id, sku_id] >= 0
+    keep = has_override | (RNG.random(len(sku_id)) < 0.3)
+    warehouse_id, sku_id = warehouse_id[keep], sku_id[keep]
     
-    for warehouse_id in STOCK_WAREHOUSES:
-        for sku_id in STOCK_SKUS:
-            if sku_id in WAREHOUSE_SAFETY_STOCK.get(warehouse_id, {}) or random.random() < 0.3:
-                current_stock = generate_current_stock(warehouse_id, sku_id)
-                
-                stock_entry = {
-                    'warehouse_id': warehouse_id,
-                    'sku_id': sku_id,
-                    'current_stock': current_stock
-                }
-                
-                stock_data.append(stock_entry)
+    safety_stock = SAFETY_STOCK_MATRIX[warehouse_id, sku_id]
     
-    return stock_data
+    return pd.DataFrame({
+        'warehouse_id': warehouse_id,
+        'sku_id': sku_id,
+        'current_stock': generate_current_stock(safety_stock)
+    })
 
 def save_stock_to_json(stock_data):
-    """Save stock data to JSON file"""
+    """Save stock data to a JSON Lines file"""
     STOCK_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     
-    with open(STOCK_OUTPUT_FILE, 'w', encoding='utf-8') as jsonfile:
-        json.dump(stock_data, jsonfile, indent=2)
+    stock_data.to_json(STOCK_OUTPUT_FILE, orient='records', lines=True)
     
     print(f"✓ Generated {len(stock_data)} stock records")
     print(f"✓ Saved to: {STOCK_OUTPUT_FILE}")
@@ -194,7 +181,7 @@ def save_stock_to_json(stock_data):
 # ========== SNAPSHOT GENERATION ==========
 
 SNAPSHOT_OUTPUT_DIR = BASE_PATH / "raw/snapshots" / TODAY.strftime("%d-%m-%Y")
-SNAPSHOT_OUTPUT_FILE = SNAPSHOT_OUTPUT_DIR / "snapshot.json"
+SNAPSHOT_OUTPUT_FILE = SNAPSHOT_OUTPUT_DIR / "snapshot.ndjson"
 
 SKU_CODES = [
     'PROD001', 'PROD002', 'PROD003', 'PROD004', 'PROD005', 'PROD006', 'PROD007', 'PROD008',
@@ -220,56 +207,48 @@ SNAPSHOT_SAFETY_STOCK = {
     'PROD036': 1, 'PROD037': 50, 'PROD038': 5, 'PROD039': 3, 'PROD040': 100
 }
 
-def generate_available_qty(sku_code):
-    """Generate realistic available quantity"""
-    safety_stock = SNAPSHOT_SAFETY_STOCK.get(sku_code, 10)
-    
-    multiplier = random.choice([
+# Safety stock aligned with SKU_CODES positions
+SNAPSHOT_SAFETY_STOCK_BY_SKU = np.array([SNAPSHOT_SAFETY_STOCK.get(code, 10) for code in SKU_CODES])
+
+def generate_available_qty(safety_stock):
+    """Generate realistic available quantities"""
+    multiplier = RNG.choice([
         0, 0.2, 0.4, 0.6, 0.8, 1.0, 1.2, 1.5, 2.0, 2.5, 3.0, 4.0
-    ])
+    ], len(safety_stock))
     
-    return max(0, int(safety_stock * multiplier))
+    return np.maximum(0, (safety_stock * multiplier).astype(int))
 
 def generate_reserved_qty(available_qty):
-    """Generate realistic reserved quantity"""
-    if available_qty == 0:
-        return 0
-    
-    reserved_pct = random.choice([
+    """Generate realistic reserved quantities (zero stock reserves nothing)"""
+    reserved_pct = RNG.choice([
         0, 0, 0, 0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30
-    ])
+    ], len(available_qty))
     
-    return int(available_qty * reserved_pct)
+    return (available_qty * reserved_pct).astype(int)
 
 def generate_snapshots():
     """Generate inventory snapshots for all SKU-warehouse combinations"""
-    snapshots = []
-    snapshot_date = TODAY.strftime('%Y-%m-%d')
+    sku_idx, warehouse_idx = (
+        grid.ravel() for grid in np.meshgrid(np.arange(len(SKU_CODES)), np.arange(len(WAREHOUSE_CODES)), indexing='ij')
+    )
+    keep = RNG.random(len(sku_idx)) < 0.7
+    sku_idx, warehouse_idx = sku_idx[keep], warehouse_idx[keep]
     
-    for sku_code in SKU_CODES:
-        for warehouse_code in WAREHOUSE_CODES:
-            if random.random() < 0.7:
-                available_qty = generate_available_qty(sku_code)
-                reserved_qty = generate_reserved_qty(available_qty)
-                
-                snapshot = {
-                    'sku_code': sku_code,
-                    'snapshot_date': snapshot_date,
-                    'warehouse_code': warehouse_code,
-                    'available_qty': available_qty,
-                    'reserved_qty': reserved_qty
-                }
-                
-                snapshots.append(snapshot)
+    available_qty = generate_available_qty(SNAPSHOT_SAFETY_STOCK_BY_SKU[sku_idx])
     
-    return snapshots
+    return pd.DataFrame({
+        'sku_code': np.array(SKU_CODES)[sku_idx],
+        'snapshot_date': TODAY.strftime('%Y-%m-%d'),
+        'warehouse_code': np.array(WAREHOUSE_CODES)[warehouse_idx],
+        'available_qty': available_qty,
+        'reserved_qty': generate_reserved_qty(available_qty)
+    })
 
 def save_snapshots_to_json(snapshots):
-    """Save snapshots to JSON file"""
+    """Save snapshots to a JSON Lines file"""
     SNAPSHOT_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     
-    with open(SNAPSHOT_OUTPUT_FILE, 'w', encoding='utf-8') as jsonfile:
-        json.dump(snapshots, jsonfile, indent=2)
+    snapshots.to_json(SNAPSHOT_OUTPUT_FILE, orient='records', lines=True)
     
     print(f"✓ Generated {len(snapshots)} inventory snapshots")
     print(f"✓ Saved to: {SNAPSHOT_OUTPUT_FILE}")
@@ -0,0 +1,69 @@
+"""
+Unit tests for the Trino -> Arrow helpers in dags/pipeline.py
+"""
+
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pytest.importorskip("airflow")
+pytest.importorskip("trino")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "dags"))
+import pipeline  # noqa: E402
+
+# (name, type_code, display_size, internal_size, precision, scale, null_ok) as reported by trino.dbapi
+DESCRIPTION = [
+    ("sku_id", "bigint", None, None, None, None, None),
+    ("unit_price", "decimal(12,4)", None, None, 12, 4, None),
+    ("currency", "varchar", None, None, None, None, None),
+    ("created_at", "timestamp(3)", None, None, 3, None, None),
+]
+
+
+def test_arrow_schema_uses_parameterised_decimal_and_timestamp_types():
+    schema = pipeline.arrow_schema_from_description(DESCRIPTION)
+
+    assert schema.field("sku_id").type == pa.int64()
+    assert schema.field("unit_price").type == pa.decimal128(12, 4)
+    assert schema.field("currency").type == pa.string()
+    assert schema.field("created_at").type == pa.timestamp("us")
+
+
+def test_rows_to_record_batch_accepts_decimal_values():
+    schema = pipeline.arrow_schema_from_description(DESCRIPTION[:3])
+    rows = [(1, Decimal("45.0000"), "MAD"), (2, Decimal("8.5000"), "MAD")]
+
+    batch = pipeline.rows_to_record_batch(rows, schema)
+
+    assert batch.num_rows == 2
+    assert batch.column(1).to_pylist() == [Decimal("45.0000"), Decimal("8.5000")]
+
+
+def test_map_trino_type_keeps_ddl_and_arrow_types_in_step():
+    assert pipeline.map_trino_type("decimal(12,4)", 12, 4) == ("decimal(12, 4)", pa.decimal128(12, 4))
+    assert pipeline.map_trino_type("bigint", None, None) == ("bigint", pa.int64())
+    assert pipeline.map_trino_type("uuid", None, None) == ("varchar", pa.string())
+
+
+def test_map_trino_type_normalises_parameterised_ddl_types():
+    assert pipeline.map_trino_type("timestamp(3)", 3, None)[0] == "timestamp"
+    assert pipeline.map_trino_type("varchar(32)", None, None)[0] == "varchar"
+
+
+def test_raw_json_loader_reads_ndjson_and_falls_back_to_legacy_json(tmp_path):
+    (tmp_path / "stock.json").write_text('[{"sku_id": 1}, {"sku_id": 2}]')
+    legacy_file = pipeline.resolve_raw_json_file(str(tmp_path), "stock")
+    assert legacy_file.endswith("stock.json")
+    assert list(pipeline.iter_raw_json_records(legacy_file)) == [{"sku_id": 1}, {"sku_id": 2}]
+
+    (tmp_path / "stock.ndjson").write_text('{"sku_id": 3}\n\n{"sku_id": 4}\n')
+    ndjson_file = pipeline.resolve_raw_json_file(str(tmp_path), "stock")
+    assert ndjson_file.endswith("stock.ndjson")
+    assert list(pipeline.iter_raw_json_records(ndjson_file)) == [{"sku_id": 3}, {"sku_id": 4}]
+
+    with pytest.raises(FileNotFoundError):
+        pipeline.resolve_raw_json_file(str(tmp_path / "missing"), "stock")